@@ -15,5 +15,7 @@ exec uvicorn main:app \
     --port "$PORT" \
     --workers "$WORKERS" \
     --log-level "$LOG_LEVEL" \
+    --loop uvloop \
+    --http httptools \
     --proxy-headers \
     --forwarded-allow-ips='*'
@@ -7,27 +7,32 @@ using yt-dlp and returns them in Apple QuickTime friendly format.
 For use with iOS apps via "Share with App" feature.
 """
 
-import json
+import asyncio
+import functools
+import hmac
 import logging
 import os
 import shutil
+import stat
 import subprocess
 import sys
 import tempfile
+import threading
 import time
 import uuid
 from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Annotated
-from urllib.parse import urlparse
 
 import yt_dlp
 from fastapi import Depends, FastAPI, HTTPException, Request, Security, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse
 from fastapi.security import APIKeyHeader
 from pydantic import BaseModel, HttpUrl
 from starlette.background import BackgroundTask
-from starlette.datastructures import Headers
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import Message, Receive, Scope, Send
 
 
 def _resolve_log_level() -> int:
@@ -74,6 +79,17 @@ def get_auth_tokens() -> set[str]:
     return {token.strip() for token in raw.split(",") if token.strip()}
 
 
+# Parsed once at import (not in lifespan, so auth can't fail open when the app
+# runs without it). Tokens are also kept as bytes for hmac.compare_digest,
+# which rejects non-ASCII str arguments.
+_AUTH_TOKENS: frozenset[str] = frozenset(get_auth_tokens())
+_AUTH_TOKEN_BYTES: tuple[bytes, ...] = tuple(t.encode() for t in _AUTH_TOKENS)
+_AUTH_ENABLED: bool = bool(_AUTH_TOKENS)
+
+# Longest Authorization header accepted; anything larger is rejected unparsed.
+_MAX_AUTH_HEADER_LEN = 512
+
+
 # ============================================================================
 # Security
 # ============================================================================
@@ -85,9 +101,7 @@ async def verify_token(
     api_key: Annotated[str | None, Security(api_key_header)],
 ) -> str:
     """Verify the API key from the Authorization header."""
-    tokens = get_auth_tokens()
-    if not tokens:
-        logger.warning("No AUTH_TOKENS configured - API is unprotected!")
+    if not _AUTH_ENABLED:
         return "anonymous"
 
     if not api_key:
@@ -97,19 +111,28 @@ async def verify_token(
             detail="Missing Authorization header",
         )
 
+    if len(api_key) > _MAX_AUTH_HEADER_LEN:
+        logger.warning("Auth rejected: header too long (len=%d)", len(api_key))
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication token",
+        )
+
     had_bearer = api_key.startswith("Bearer ")
     # Support "Bearer <token>" format
-    token = api_key.removeprefix("Bearer ").strip()
+    token = api_key[7:].strip() if had_bearer else api_key.strip()
     logger.debug(
         "Auth check: header present (len=%d, bearer_prefix=%s, token_len=%d), "
         "%d configured token(s)",
         len(api_key),
         had_bearer,
         len(token),
-        len(tokens),
+        len(_AUTH_TOKENS),
     )
 
-    if token not in tokens:
+    # Constant-time comparison so response timing doesn't leak token contents
+    token_bytes = token.encode()
+    if not any(hmac.compare_digest(token_bytes, t) for t in _AUTH_TOKEN_BYTES):
         logger.warning(
             "Auth rejected: token not recognized (token_len=%d, bearer_prefix=%s)",
             len(token),
@@ -153,18 +176,67 @@ class HealthResponse(BaseModel):
 # ============================================================================
 
 
+_TWITTER_HOSTS = frozenset({"twitter.com", "x.com"})
+
+
+@functools.lru_cache(maxsize=1024)
 def is_twitter_url(url: str) -> bool:
     """Check if URL is from Twitter/X."""
-    try:
-        host = urlparse(url).netloc.lower()
-    except Exception:
-        return False
-    host = host.removeprefix("www.")
-    return host in ("twitter.com", "x.com", "mobile.twitter.com", "mobile.x.com")
+    # Plain string slicing; urlparse is far heavier than we need for the host.
+    host = url.partition("://")[2]
+    for sep in "/?#":
+        host = host.partition(sep)[0]
+    host = host.rpartition("@")[2].partition(":")[0].lower()
+    return host.removeprefix("www.").removeprefix("mobile.") in _TWITTER_HOSTS
+
+
+# External binaries, resolved once; PATH and the image contents don't change at
+# runtime. The /usr/local/bin fallbacks match where the Docker image puts them.
+_FFMPEG = shutil.which("ffmpeg") or "/usr/local/bin/ffmpeg"
+_FFPROBE = shutil.which("ffprobe") or "/usr/local/bin/ffprobe"
+_HAS_FFMPEG = os.path.isfile(_FFMPEG)
+_HAS_FFPROBE = os.path.isfile(_FFPROBE)
+_DENO = "/usr/local/bin/deno" if os.path.isfile("/usr/local/bin/deno") else None
+_ARIA2C = shutil.which("aria2c")
+
+# YTDLP_SPEED_PROFILE presets: concurrent fragments, download buffer, and
+# aria2c connections per download / min split size. "balanced" is the default.
+_SPEED_PROFILES: dict[str, dict] = {
+    "conservative": {
+        "concurrent_fragment_downloads": 3,
+        "buffersize": 10 * 1024 * 1024,
+        "aria2c_connections": 8,
+        "aria2c_split_size": "5M",
+    },
+    "balanced": {
+        "concurrent_fragment_downloads": 4,
+        "buffersize": 20 * 1024 * 1024,
+        "aria2c_connections": 16,
+        "aria2c_split_size": "8M",
+    },
+    "aggressive": {
+        "concurrent_fragment_downloads": 6,
+        "buffersize": 30 * 1024 * 1024,
+        # aria2c caps connections per server at 16
+        "aria2c_connections": 16,
+        "aria2c_split_size": "10M",
+    },
+}
 
 
-def build_ydl_opts(output_dir: Path, twitter_api: str | None = None) -> dict:
-    """Build yt-dlp options optimized for Apple QuickTime compatibility."""
+def _resolve_speed_profile() -> dict:
+    """Resolve the download tuning preset from YTDLP_SPEED_PROFILE."""
+    name = os.getenv("YTDLP_SPEED_PROFILE", "balanced").strip().lower()
+    if name not in _SPEED_PROFILES:
+        logger.warning(f"Unknown YTDLP_SPEED_PROFILE={name!r}, using 'balanced'")
+        name = "balanced"
+    return _SPEED_PROFILES[name]
+
+
+def _build_base_ydl_opts() -> dict:
+    """Build the request-independent yt-dlp options (env and binaries)."""
+    profile = _resolve_speed_profile()
+
     # Format selection for Apple QuickTime compatibility:
     # - Prefer H.264 video codec (avc1) which has native QuickTime support
     # - Prefer AAC audio codec which is natively supported
@@ -179,7 +251,6 @@ def build_ydl_opts(output_dir: Path, twitter_api: str | None = None) -> dict:
     ydl_opts: dict = {
         "format": format_spec,
         "merge_output_format": "mp4",
-        "outtmpl": str(output_dir / "%(title).200B.%(ext)s"),
         "quiet": True,
         "no_warnings": False,
         "noplaylist": True,
@@ -189,7 +260,8 @@ def build_ydl_opts(output_dir: Path, twitter_api: str | None = None) -> dict:
         "extractor_retries": 3,
         "restrictfilenames": True,
         "socket_timeout": 30,
-        "concurrent_fragment_downloads": 4,
+        "concurrent_fragment_downloads": profile["concurrent_fragment_downloads"],
+        "buffersize": profile["buffersize"],
         # Postprocessor to ensure MP4 container with faststart for streaming
         "postprocessors": [
             {
@@ -197,27 +269,43 @@ def build_ydl_opts(output_dir: Path, twitter_api: str | None = None) -> dict:
                 "preferedformat": "mp4",
             }
         ],
+        # Write faststart MP4s while yt-dlp is already rewriting the file, so no
+        # separate remux pass is needed. Merged downloads skip the remuxer (they
+        # are already MP4), hence the merger entry.
+        "postprocessor_args": {
+            "merger+ffmpeg_o": ["-movflags", "+faststart", "-brand", "mp42"],
+            "videoremuxer+ffmpeg_o": ["-movflags", "+faststart", "-brand", "mp42"],
+        },
     }
 
     # FFmpeg location
-    if Path("/usr/local/bin/ffmpeg").exists():
-        ydl_opts["ffmpeg_location"] = "/usr/local/bin"
+    if _HAS_FFMPEG:
+        ydl_opts["ffmpeg_location"] = os.path.dirname(_FFMPEG)
+
+    # aria2c for multi-connection fragment downloads. concurrent_fragment_downloads
+    # above still applies to yt-dlp's native downloader when aria2c is absent.
+    if _ARIA2C:
+        ydl_opts["external_downloader"] = {
+            "m3u8": "aria2c",
+            "dash": "aria2c",
+            "http": "aria2c",
+        }
+        ydl_opts["external_downloader_args"] = {
+            "aria2c": [
+                "-x",
+                str(profile["aria2c_connections"]),
+                "-s",
+                str(profile["aria2c_connections"]),
+                "-k",
+                profile["aria2c_split_size"],
+                "--file-allocation=none",
+                "--summary-interval=0",
+            ]
+        }
 
     # Deno for JavaScript-heavy sites
-    if Path("/usr/local/bin/deno").exists():
-        ydl_opts["js_runtimes"] = {"deno": {"path": "/usr/local/bin/deno"}}
-
-    # Cookies file
-    cookies_file = os.getenv("YTDLP_COOKIES_FILE")
-    if cookies_file and Path(cookies_file).exists():
-        temp_cookies = output_dir / "cookies.txt"
-        shutil.copy2(cookies_file, temp_cookies)
-        ydl_opts["cookiefile"] = str(temp_cookies)
-        logger.debug(f"Using cookies from {cookies_file}")
-
-    # Twitter-specific API
-    if twitter_api:
-        ydl_opts["extractor_args"] = {"twitter": {"api": [twitter_api]}}
+    if _DENO:
+        ydl_opts["js_runtimes"] = {"deno": {"path": _DENO}}
 
     # Custom User-Agent
     user_agent = os.getenv("YTDLP_USER_AGENT")
@@ -227,36 +315,68 @@ def build_ydl_opts(output_dir: Path, twitter_api: str | None = None) -> dict:
     return ydl_opts
 
 
+# Static options, resolved once at import since env and binaries never change.
+_YDL_BASE_OPTS = _build_base_ydl_opts()
+
+
+def build_ydl_opts(output_dir: Path, twitter_api: str | None = None) -> dict:
+    """Build yt-dlp options optimized for Apple QuickTime compatibility."""
+    ydl_opts = _YDL_BASE_OPTS.copy()
+    ydl_opts["outtmpl"] = str(output_dir / "%(title).200B.%(ext)s")
+
+    # Cookies file (private copy made once at startup by prepare_cookies_file)
+    if _COOKIES_FILE:
+        ydl_opts["cookiefile"] = _COOKIES_FILE
+
+    # Twitter-specific API
+    if twitter_api:
+        ydl_opts["extractor_args"] = {"twitter": {"api": [twitter_api]}}
+
+    return ydl_opts
+
+
 def get_video_info(path: Path) -> dict:
-    """Get video stream info using ffprobe."""
-    ffprobe = shutil.which("ffprobe") or "/usr/local/bin/ffprobe"
-    if not Path(ffprobe).exists():
+    """Get video stream info (codec_name, sample_aspect_ratio) using ffprobe."""
+    if not _HAS_FFPROBE:
         logger.warning("ffprobe not found, skipping video analysis")
         return {}
 
+    # Bare CSV of just the fields needs_quicktime_fix reads, e.g. "h264,1:1".
+    # ffprobe emits them in its own order, which is codec_name first.
     cmd = [
-        ffprobe,
+        _FFPROBE,
         "-v",
         "error",
         "-select_streams",
         "v:0",
         "-show_entries",
-        "stream=codec_name,width,height,sample_aspect_ratio,display_aspect_ratio",
+        "stream=codec_name,sample_aspect_ratio",
         "-of",
-        "json",
+        "csv=p=0",
         str(path),
     ]
 
     try:
         result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-        if result.returncode != 0:
-            logger.error(f"ffprobe failed: {result.stderr}")
-            return {}
-        data = json.loads(result.stdout)
-        return data.get("streams", [{}])[0]
-    except (subprocess.TimeoutExpired, json.JSONDecodeError) as e:
+    except subprocess.TimeoutExpired as e:
         logger.error(f"ffprobe error: {e}")
         return {}
+    if result.returncode != 0:
+        logger.error(f"ffprobe failed: {result.stderr}")
+        return {}
+
+    line = result.stdout.strip().partition("\n")[0]
+    if not line:
+        return {}
+    # Take exactly two fields: side data (e.g. a rotation display matrix) can
+    # append a trailing comma, as in "h264,4:3,".
+    codec, _, rest = line.partition(",")
+    sar = rest.partition(",")[0].strip()
+    return {"codec_name": codec, "sample_aspect_ratio": sar}
+
+
+# ffprobe SAR values that mean square pixels (or unknown, treated as square).
+_SAR_SQUARE = frozenset({"1:1", "N/A", "0:1", ""})
 
 
 def needs_quicktime_fix(video_info: dict) -> tuple[bool, str]:
@@ -276,27 +396,161 @@ def needs_quicktime_fix(video_info: dict) -> tuple[bool, str]:
     if codec and codec.lower() not in quicktime_codecs:
         return True, f"Incompatible codec: {codec}"
 
-    # Check SAR
-    if sar and sar not in ("1:1", "N/A", "0:1", ""):
+    # Check SAR (square pixels are the overwhelmingly common case)
+    if sar and sar not in _SAR_SQUARE:
+        num, sep, den = sar.partition(":")
+        if sep and num != den and num.isdecimal() and den.isdecimal():
+            if int(den) > 0 and int(num) != int(den):
+                return True, f"Non-square SAR: {sar}"
+
+    return False, ""
+
+
+def has_faststart(path: Path) -> bool:
+    """
+    Check whether an MP4's moov atom precedes mdat (streamable without remux).
+    Only walks top-level box headers, so this reads a few bytes per box.
+    """
+    try:
+        with path.open("rb") as f:
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    return False
+                size = int.from_bytes(header[:4], "big")
+                kind = header[4:8]
+                if kind == b"moov":
+                    return True
+                if kind == b"mdat":
+                    return False
+                if size == 1:
+                    # 64-bit largesize follows the type field
+                    size = int.from_bytes(f.read(8), "big")
+                    f.seek(size - 16, os.SEEK_CUR)
+                elif size >= 8:
+                    f.seek(size - 8, os.SEEK_CUR)
+                else:
+                    # size 0 (box runs to EOF) or malformed
+                    return False
+    except OSError:
+        return False
+
+
+# H.264 encoders in order of preference: (pre-input args, filter suffix,
+# rate control). libx264 is the always-available software fallback. Output is
+# pinned to 8-bit 4:2:0: 10-bit sources (VP9.2, AV1) would otherwise fail on
+# the hardware encoders or come out as High 10, which QuickTime can't play.
+_H264_ENCODERS: dict[str, tuple[list[str], str, list[str]]] = {
+    # -b:v 0 lifts nvenc's default 2 Mb/s target so -cq acts like CRF
+    "h264_nvenc": (
+        [],
+        ",format=yuv420p",
+        ["-rc", "vbr", "-cq", "23", "-b:v", "0", "-preset", "p4"],
+    ),
+    "h264_qsv": ([], ",format=yuv420p", ["-global_quality", "23"]),
+    # VideoToolbox -q:v runs 1-100 (higher is better), unlike CRF
+    "h264_videotoolbox": ([], ",format=yuv420p", ["-q:v", "65"]),
+    "h264_vaapi": (
+        ["-vaapi_device", "/dev/dri/renderD128"],
+        ",format=nv12,hwupload",
+        ["-qp", "23"],
+    ),
+    "libx264": ([], ",format=yuv420p", ["-preset", "fast", "-crf", "23"]),
+}
+
+# Resolved once in lifespan by detect_h264_encoder().
+_H264_ENCODER: str = "libx264"
+
+
+def detect_h264_encoder() -> str:
+    """
+    Pick the fastest working H.264 encoder.
+
+    ``ffmpeg -encoders`` only lists what was compiled in, so each hardware
+    candidate is confirmed with a one-frame test encode before it is chosen.
+    """
+    if not _HAS_FFMPEG:
+        return "libx264"
+
+    try:
+        listed = subprocess.run(
+            [_FFMPEG, "-hide_banner", "-encoders"],
+            capture_output=True,
+            text=True,
+            timeout=10,
+        ).stdout
+    except subprocess.TimeoutExpired:
+        return "libx264"
+
+    for encoder, (input_args, vf_suffix, _) in _H264_ENCODERS.items():
+        if encoder == "libx264" or f" {encoder} " not in listed:
+            continue
+        cmd = [
+            _FFMPEG,
+            "-hide_banner",
+            "-v",
+            "error",
+            *input_args,
+            "-f",
+            "lavfi",
+            "-i",
+            "color=black:s=256x256:d=0.1",
+            "-vf",
+            vf_suffix.removeprefix(","),
+            "-frames:v",
+            "1",
+            "-c:v",
+            encoder,
+            "-f",
+            "null",
+            "-",
+        ]
         try:
-            sar_parts = sar.split(":")
-            if len(sar_parts) == 2:
-                sar_num, sar_den = int(sar_parts[0]), int(sar_parts[1])
-                if sar_den > 0 and sar_num != sar_den:
-                    return True, f"Non-square SAR: {sar}"
-        except (ValueError, ZeroDivisionError):
+            if subprocess.run(cmd, capture_output=True, timeout=15).returncode == 0:
+                return encoder
+        except subprocess.TimeoutExpired:
             pass
+        logger.debug(f"H.264 encoder {encoder} listed but not usable")
 
-    return False, ""
+    return "libx264"
+
+
+def _reencode_cmd(encoder: str, path: Path, output_path: Path) -> list[str]:
+    """Build the ffmpeg H.264/AAC re-encode command for the given encoder."""
+    input_args, vf_suffix, rate_args = _H264_ENCODERS[encoder]
+    return [
+        _FFMPEG,
+        "-y",
+        *input_args,
+        "-i",
+        str(path),
+        "-vf",
+        f"scale='trunc(iw*sar/2)*2:trunc(ih/2)*2',setsar=1{vf_suffix}",
+        "-c:v",
+        encoder,
+        *rate_args,
+        "-c:a",
+        "aac",
+        "-b:a",
+        "128k",
+        "-movflags",
+        "+faststart",
+        "-brand",
+        "mp42",
+        str(output_path),
+    ]
 
 
 def process_for_quicktime(path: Path, output_dir: Path) -> Path:
     """
     Process video for Apple QuickTime compatibility with minimal ffmpeg usage.
     Only re-encodes if absolutely necessary.
+
+    yt-dlp's postprocessors already write faststart MP4s, so compatible files
+    are returned untouched; a copy remux only runs for files that bypassed
+    them with the moov atom at the end.
     """
-    ffmpeg = shutil.which("ffmpeg") or "/usr/local/bin/ffmpeg"
-    if not Path(ffmpeg).exists():
+    if not _HAS_FFMPEG:
         logger.warning("ffmpeg not found, returning original file")
         return path
 
@@ -309,36 +563,17 @@ def process_for_quicktime(path: Path, output_dir: Path) -> Path:
     output_path = output_dir / f"{path.stem}.qt.mp4"
 
     if needs_fix:
-        logger.info(f"Processing required: {reason}")
+        logger.info(f"Processing required: {reason} (encoder={_H264_ENCODER})")
         # Re-encode with H.264 for maximum compatibility
-        cmd = [
-            ffmpeg,
-            "-y",
-            "-i",
-            str(path),
-            "-vf",
-            "scale='trunc(iw*sar/2)*2:trunc(ih/2)*2',setsar=1",
-            "-c:v",
-            "libx264",
-            "-preset",
-            "fast",
-            "-crf",
-            "23",
-            "-c:a",
-            "aac",
-            "-b:a",
-            "128k",
-            "-movflags",
-            "+faststart",
-            "-brand",
-            "mp42",
-            str(output_path),
-        ]
+        cmd = _reencode_cmd(_H264_ENCODER, path, output_path)
+    elif has_faststart(path):
+        logger.info("Video already QuickTime compatible (no processing)")
+        return path
     else:
-        # Just remux with faststart for streaming (no re-encoding)
+        # Direct MP4 download that skipped yt-dlp's postprocessors
         logger.info("Remuxing for streaming optimization (no re-encoding)")
         cmd = [
-            ffmpeg,
+            _FFMPEG,
             "-y",
             "-i",
             str(path),
@@ -352,9 +587,26 @@ def process_for_quicktime(path: Path, output_dir: Path) -> Path:
         ]
 
     try:
-        result = subprocess.run(
-            cmd, check=True, capture_output=True, text=True, timeout=600
-        )
+        try:
+            result = subprocess.run(
+                cmd, check=True, capture_output=True, text=True, timeout=600
+            )
+        except subprocess.CalledProcessError as e:
+            if not needs_fix or _H264_ENCODER == "libx264":
+                raise
+            # Hardware encoders can still reject real inputs (or run out of
+            # sessions under concurrent downloads); libx264 always works.
+            error_msg = e.stderr[-500:] if e.stderr else str(e)
+            logger.warning(
+                f"{_H264_ENCODER} re-encode failed, retrying with libx264: {error_msg}"
+            )
+            result = subprocess.run(
+                _reencode_cmd("libx264", path, output_path),
+                check=True,
+                capture_output=True,
+                text=True,
+                timeout=600,
+            )
         logger.debug(f"ffmpeg output: {result.stderr[-500:] if result.stderr else ''}")
     except subprocess.TimeoutExpired:
         raise RuntimeError("Video processing timed out (10 minutes)")
@@ -369,14 +621,40 @@ def process_for_quicktime(path: Path, output_dir: Path) -> Path:
     return output_path
 
 
+_ydl_local = threading.local()
+
+
+def _get_ydl(twitter_api: str | None, cookies_file: str | None) -> yt_dlp.YoutubeDL:
+    """
+    Return this thread's long-lived YoutubeDL for the given configuration.
+
+    Instances are never closed, so yt-dlp's HTTP handlers keep their
+    keep-alive pools and extractors stay initialized between requests. They
+    are cached per thread because a YoutubeDL must not run two downloads at
+    once; callers redirect ``outtmpl`` before each download.
+    """
+    instances = getattr(_ydl_local, "instances", None)
+    if instances is None:
+        instances = _ydl_local.instances = {}
+
+    key = (twitter_api, cookies_file)
+    ydl = instances.get(key)
+    if ydl is None:
+        # outtmpl is replaced per request, so the base dir here is a placeholder
+        ydl = yt_dlp.YoutubeDL(build_ydl_opts(_TEMP_ROOT, twitter_api))
+        instances[key] = ydl
+        logger.debug(f"Created YoutubeDL instance (api={twitter_api})")
+    return ydl
+
+
 def normalize_download_path(filename: str) -> Path:
     """Normalize downloaded file path, handling extension changes."""
-    path = Path(filename)
-    if path.suffix.lower() != ".mp4" and path.exists():
-        mp4_path = path.with_suffix(".mp4")
-        if mp4_path.exists():
-            return mp4_path
-    return path
+    base, ext = os.path.splitext(filename)
+    if ext.lower() == ".mp4":
+        return Path(filename)
+    # The remuxer replaces e.g. video.webm with video.mp4
+    mp4_path = base + ".mp4"
+    return Path(mp4_path if os.path.exists(mp4_path) else filename)
 
 
 def download_video(url: str, output_dir: Path) -> Path:
@@ -395,15 +673,18 @@ def download_video(url: str, output_dir: Path) -> Path:
         api_candidates = [os.getenv("YTDLP_TWITTER_API", "syndication")]
 
     # For non-Twitter URLs, only try once without special API
-    attempts = api_candidates if is_twitter_url(url) else [None]
+    is_twitter = is_twitter_url(url)
+    attempts = api_candidates if is_twitter else [None]
     last_error: Exception | None = None
 
     for api in attempts:
         try:
-            ydl_opts = build_ydl_opts(output_dir, api)
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=True)
-                filename = ydl.prepare_filename(info)
+            ydl = _get_ydl(api, _COOKIES_FILE)
+            ydl.params["outtmpl"]["default"] = str(
+                output_dir / "%(title).200B.%(ext)s"
+            )
+            info = ydl.extract_info(url, download=True)
+            filename = ydl.prepare_filename(info)
 
             downloaded = normalize_download_path(filename)
             if not downloaded.exists():
@@ -415,7 +696,7 @@ def download_video(url: str, output_dir: Path) -> Path:
         except Exception as exc:
             logger.error(f"Download failed (api={api}): {exc}")
             last_error = exc
-            if not is_twitter_url(url):
+            if not is_twitter:
                 break
 
     if last_error:
@@ -423,6 +704,178 @@ def download_video(url: str, output_dir: Path) -> Path:
     raise RuntimeError("Download failed with unknown error")
 
 
+class ZeroCopyFileResponse(FileResponse):
+    """FileResponse that hands the file descriptor to the server when it can.
+
+    Servers advertising the ASGI ``http.response.zerocopysend`` extension
+    send the file with ``sendfile(2)`` so the body never passes through
+    Python. Only plain full-body responses take that path; HEAD and Range
+    requests (and everything else) fall back to Starlette, which handles
+    them properly.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            "http.response.zerocopysend" not in scope.get("extensions", {})
+            or scope.get("method") == "HEAD"
+            or "range" in Headers(scope=scope)
+        ):
+            await super().__call__(scope, receive, send)
+            return
+
+        # The descriptor is closed only once send() returns, i.e. after the
+        # server has finished sending it; nothing between us and the server
+        # may buffer this message (see RequestLoggingMiddleware).
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            self.set_stat_headers(os.fstat(fd))
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": self.status_code,
+                    "headers": self.raw_headers,
+                }
+            )
+            await send(
+                {
+                    "type": "http.response.zerocopysend",
+                    "file": fd,
+                    "more_body": False,
+                }
+            )
+        finally:
+            os.close(fd)
+
+        if self.background is not None:
+            await self.background()
+
+
+# Per-request download dirs live under one per-host root; stale ones left by
+# crashed workers are swept periodically instead of relying on each request.
+_TEMP_ROOT = Path(tempfile.gettempdir()) / "ytdlp-api"
+_TEMP_MAX_AGE = 2 * 60 * 60  # seconds
+_TEMP_SWEEP_INTERVAL = 10 * 60  # seconds
+
+
+def ensure_temp_root() -> None:
+    """
+    Create _TEMP_ROOT if missing and verify it is private to this process.
+    The path is predictable, so an existing entry is only reused if it is a
+    real directory (not a symlink) owned by us with mode 0700.
+    """
+    try:
+        os.mkdir(_TEMP_ROOT, 0o700)
+        # mkdir's mode is filtered by the umask; pin it exactly
+        os.chmod(_TEMP_ROOT, 0o700)
+    except FileExistsError:
+        pass
+
+    st = os.lstat(_TEMP_ROOT)
+    if (
+        not stat.S_ISDIR(st.st_mode)
+        or st.st_uid != os.getuid()
+        or stat.S_IMODE(st.st_mode) != 0o700
+    ):
+        raise RuntimeError(
+            f"Refusing to use temp root {_TEMP_ROOT}: it must be a directory "
+            f"owned by uid {os.getuid()} with mode 0700"
+        )
+
+
+def make_request_dir() -> Path:
+    """Create a fresh per-request download dir under _TEMP_ROOT."""
+    path = _TEMP_ROOT / uuid.uuid4().hex
+    try:
+        path.mkdir(mode=0o700)
+    except FileNotFoundError:
+        # A tmp cleaner removed the idle root; recreate (and re-verify) it, and
+        # restore the cookies copy that went with it
+        ensure_temp_root()
+        if _COOKIES_FILE:
+            prepare_cookies_file()
+        path.mkdir(mode=0o700)
+    return path
+
+
+# Set in lifespan; the private cookies copy every YoutubeDL instance reads.
+_COOKIES_FILE: str | None = None
+
+
+def prepare_cookies_file() -> str | None:
+    """
+    Copy YTDLP_COOKIES_FILE into the temp root once per process.
+    Relies on ensure_temp_root() having verified the root is private.
+    yt-dlp writes its cookie jar back on close(), so instances never point at
+    the operator's file directly. They only read the copy, and the cached
+    instances are never closed, so no lock is needed around it.
+    """
+    source = os.getenv("YTDLP_COOKIES_FILE")
+    if not source or not Path(source).exists():
+        return None
+    target = _TEMP_ROOT / "cookies.txt"
+    # Copy-then-replace so concurrently starting workers never see a partial
+    # file. copyfile (not copy2) so the source's mode isn't carried over; the
+    # copy holds session cookies and must stay owner-only.
+    staging = _TEMP_ROOT / f"cookies.{os.getpid()}.tmp"
+    shutil.copyfile(source, staging)
+    os.chmod(staging, 0o600)
+    os.replace(staging, target)
+    logger.debug(f"Using cookies from {source}")
+    return str(target)
+
+
+def remove_temp_dir(path: Path) -> None:
+    """
+    Delete a per-request temp dir.
+    Downloads are written flat, so a single scandir pass with unlink avoids
+    rmtree's per-entry stat; any unexpected subdirectory falls back to rmtree.
+    """
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                else:
+                    try:
+                        os.unlink(entry.path)
+                    except OSError:
+                        pass
+        os.rmdir(path)
+    except OSError:
+        pass
+
+
+def sweep_stale_temp_dirs() -> int:
+    """Remove request dirs older than _TEMP_MAX_AGE. Returns count removed."""
+    cutoff = time.time() - _TEMP_MAX_AGE
+    try:
+        with os.scandir(_TEMP_ROOT) as entries:
+            stale = [
+                entry.path
+                for entry in entries
+                if entry.is_dir(follow_symlinks=False)
+                and entry.stat(follow_symlinks=False).st_mtime < cutoff
+            ]
+    except OSError:
+        return 0
+    for path in stale:
+        remove_temp_dir(Path(path))
+    return len(stale)
+
+
+async def _sweep_temp_dirs_periodically() -> None:
+    """Run sweep_stale_temp_dirs every _TEMP_SWEEP_INTERVAL seconds."""
+    while True:
+        await asyncio.sleep(_TEMP_SWEEP_INTERVAL)
+        try:
+            removed = await run_in_threadpool(sweep_stale_temp_dirs)
+        except Exception:
+            logger.exception("Temp directory sweep failed")
+            continue
+        if removed:
+            logger.info(f"Swept {removed} stale temp dir(s)")
+
+
 # ============================================================================
 # FastAPI Application
 # ============================================================================
@@ -431,6 +884,7 @@ def download_video(url: str, output_dir: Path) -> Path:
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler."""
+    global _H264_ENCODER, _COOKIES_FILE
     logger.info("Video Download API starting up")
     logger.info(
         "Bind config: API_HOST=%s API_PORT=%s API_WORKERS=%s API_LOG_LEVEL=%s",
@@ -441,25 +895,34 @@ async def lifespan(app: FastAPI):
     )
     logger.debug(
         "yt-dlp config: cookies_file=%s twitter_api=%s twitter_api_order=%s "
-        "custom_user_agent=%s custom_format=%s",
+        "custom_user_agent=%s custom_format=%s speed_profile=%s",
         os.getenv("YTDLP_COOKIES_FILE", "<none>"),
         os.getenv("YTDLP_TWITTER_API", "<default>"),
         os.getenv("YTDLP_TWITTER_API_ORDER", "<default>"),
         "yes" if os.getenv("YTDLP_USER_AGENT") else "no",
         "yes" if os.getenv("YTDLP_FORMAT") else "no",
+        os.getenv("YTDLP_SPEED_PROFILE", "<default>"),
     )
     logger.debug(
-        "Binary discovery: ffmpeg=%s ffprobe=%s deno=%s",
-        shutil.which("ffmpeg") or "/usr/local/bin/ffmpeg(?)",
-        shutil.which("ffprobe") or "/usr/local/bin/ffprobe(?)",
-        shutil.which("deno") or "<none>",
+        "Binary discovery: ffmpeg=%s ffprobe=%s deno=%s aria2c=%s",
+        _FFMPEG if _HAS_FFMPEG else "<none>",
+        _FFPROBE if _HAS_FFPROBE else "<none>",
+        _DENO or "<none>",
+        _ARIA2C or "<none>",
     )
-    tokens = get_auth_tokens()
-    if tokens:
-        logger.info(f"Loaded {len(tokens)} auth token(s)")
+    _H264_ENCODER = detect_h264_encoder()
+    logger.info(f"H.264 encoder for re-encodes: {_H264_ENCODER}")
+    if _AUTH_ENABLED:
+        logger.info(f"Loaded {len(_AUTH_TOKENS)} auth token(s)")
     else:
         logger.warning("No AUTH_TOKENS configured - API is unprotected!")
+    ensure_temp_root()
+    removed = sweep_stale_temp_dirs()
+    logger.debug(f"Temp root: {_TEMP_ROOT} (removed {removed} stale dir(s))")
+    _COOKIES_FILE = prepare_cookies_file()
+    sweeper = asyncio.create_task(_sweep_temp_dirs_periodically())
     yield
+    sweeper.cancel()
     logger.info("Video Download API shutting down")
 
 
@@ -471,64 +934,84 @@ app = FastAPI(
 )
 
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
+class RequestLoggingMiddleware:
     """Trace every request: client, proxy headers, status, and latency.
 
     At DEBUG this also dumps the full (redacted) header set, which is the
     fastest way to diagnose reverse-proxy / auth connection problems.
+
+    Written as plain ASGI rather than ``@app.middleware("http")``: Starlette's
+    BaseHTTPMiddleware re-queues response messages and rejects anything but
+    ``http.response.body``, which breaks ZeroCopyFileResponse. Here messages
+    go straight through to the server, only gaining an X-Request-ID header.
     """
-    request_id = uuid.uuid4().hex[:8]
-    client_host = request.client.host if request.client else "unknown"
-    # When behind Traefik/another proxy the real client is in X-Forwarded-For.
-    forwarded_for = request.headers.get("x-forwarded-for", "-")
-    forwarded_proto = request.headers.get("x-forwarded-proto", "-")
-    forwarded_host = request.headers.get("x-forwarded-host", "-")
 
-    logger.info(
-        "[%s] --> %s %s from client=%s xff=%s proto=%s host=%s ua=%r",
-        request_id,
-        request.method,
-        request.url.path,
-        client_host,
-        forwarded_for,
-        forwarded_proto,
-        forwarded_host,
-        request.headers.get("user-agent", "-"),
-    )
-    if logger.isEnabledFor(logging.DEBUG):
-        logger.debug(
-            "[%s] request headers: %s | query: %s",
-            request_id,
-            _redact_headers(request.headers),
-            dict(request.query_params) or "{}",
-        )
+    def __init__(self, app) -> None:
+        self.app = app
 
-    start = time.perf_counter()
-    try:
-        response = await call_next(request)
-    except Exception:
-        elapsed_ms = (time.perf_counter() - start) * 1000
-        logger.exception(
-            "[%s] !! unhandled error after %.1fms processing %s %s",
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+        request_id = uuid.uuid4().hex[:8]
+        client_host = request.client.host if request.client else "unknown"
+        # When behind Traefik/another proxy the real client is in X-Forwarded-For.
+        forwarded_for = request.headers.get("x-forwarded-for", "-")
+        forwarded_proto = request.headers.get("x-forwarded-proto", "-")
+        forwarded_host = request.headers.get("x-forwarded-host", "-")
+
+        logger.info(
+            "[%s] --> %s %s from client=%s xff=%s proto=%s host=%s ua=%r",
             request_id,
-            elapsed_ms,
             request.method,
             request.url.path,
+            client_host,
+            forwarded_for,
+            forwarded_proto,
+            forwarded_host,
+            request.headers.get("user-agent", "-"),
         )
-        raise
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "[%s] request headers: %s | query: %s",
+                request_id,
+                _redact_headers(request.headers),
+                dict(request.query_params) or "{}",
+            )
 
-    elapsed_ms = (time.perf_counter() - start) * 1000
-    logger.info(
-        "[%s] <-- %s %s %d (%.1fms)",
-        request_id,
-        request.method,
-        request.url.path,
-        response.status_code,
-        elapsed_ms,
-    )
-    response.headers["X-Request-ID"] = request_id
-    return response
+        start = time.perf_counter()
+
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Request-ID", request_id)
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                logger.info(
+                    "[%s] <-- %s %s %d (%.1fms)",
+                    request_id,
+                    request.method,
+                    request.url.path,
+                    message["status"],
+                    elapsed_ms,
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        except Exception:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            logger.exception(
+                "[%s] !! unhandled error after %.1fms processing %s %s",
+                request_id,
+                elapsed_ms,
+                request.method,
+                request.url.path,
+            )
+            raise
+
+
+app.add_middleware(RequestLoggingMiddleware)
 
 
 @app.get("/health", response_model=HealthResponse, tags=["Health"])
@@ -539,7 +1022,7 @@ async def health_check():
 
 @app.post(
     "/download",
-    response_class=FileResponse,
+    response_class=ZeroCopyFileResponse,
     responses={
         200: {
             "description": "Video file download",
@@ -570,14 +1053,21 @@ async def download_endpoint(
     logger.info(f"Download request: {url}")
 
     # Create temporary directory for download
-    tmp_dir = tempfile.mkdtemp(prefix="ytdlp-api-")
-    tmp_path = Path(tmp_dir)
+    try:
+        tmp_path = make_request_dir()
+    except (OSError, RuntimeError) as e:
+        logger.error(f"Cannot create temp directory: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Temporary storage unavailable",
+        )
 
     try:
-        video_path = download_video(url, tmp_path)
+        # yt-dlp and ffmpeg block for minutes; keep the event loop free
+        video_path = await run_in_threadpool(download_video, url, tmp_path)
 
         if not video_path.exists():
-            shutil.rmtree(tmp_path, ignore_errors=True)
+            remove_temp_dir(tmp_path)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Download completed but video file not found",
@@ -588,10 +1078,10 @@ async def download_endpoint(
         filename = video_path.name
 
         def cleanup_temp_dir():
-            shutil.rmtree(tmp_path, ignore_errors=True)
+            remove_temp_dir(tmp_path)
             logger.debug(f"Cleaned up temp directory: {tmp_path}")
 
-        return FileResponse(
+        return ZeroCopyFileResponse(
             path=video_path,
             media_type="video/mp4",
             filename=filename,
@@ -604,10 +1094,10 @@ async def download_endpoint(
 
     except HTTPException:
         # Re-raise HTTP exceptions as-is
-        shutil.rmtree(tmp_path, ignore_errors=True)
+        remove_temp_dir(tmp_path)
         raise
     except yt_dlp.utils.DownloadError as e:
-        shutil.rmtree(tmp_path, ignore_errors=True)
+        remove_temp_dir(tmp_path)
         error_msg = str(e)
         if "Private video" in error_msg:
             raise HTTPException(
@@ -625,9 +1115,26 @@ async def download_endpoint(
                 detail=f"Download error: {error_msg[:200]}",
             )
     except Exception as e:
-        shutil.rmtree(tmp_path, ignore_errors=True)
+        remove_temp_dir(tmp_path)
         logger.exception(f"Download failed: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Download failed: {str(e)[:200]}",
         )
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # Mirrors entrypoint.sh for running without the container (python main.py)
+    uvicorn.run(
+        "main:app",
+        host=os.getenv("API_HOST", "0.0.0.0"),
+        port=int(os.getenv("API_PORT", "8000")),
+        workers=int(os.getenv("API_WORKERS", "1")),
+        log_level=os.getenv("API_LOG_LEVEL", "info"),
+        loop="uvloop",
+        http="httptools",
+        proxy_headers=True,
+        forwarded_allow_ips="*",
+    )
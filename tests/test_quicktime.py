@@ -0,0 +1,67 @@
+"""Tests for the QuickTime re-encode path and its encoder fallback."""
+
+import subprocess
+from pathlib import Path
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def ffmpeg_calls(monkeypatch, tmp_path):
+    """Stub ffprobe/ffmpeg; encoders listed in ``failing`` exit non-zero."""
+    monkeypatch.setattr(main, "_HAS_FFMPEG", True)
+    monkeypatch.setattr(
+        main,
+        "get_video_info",
+        lambda path: {"codec_name": "vp9", "sample_aspect_ratio": "1:1"},
+    )
+    calls: list[list[str]] = []
+    failing: set[str] = set()
+
+    def fake_run(cmd, **kwargs):
+        calls.append(cmd)
+        encoder = cmd[cmd.index("-c:v") + 1]
+        if encoder in failing:
+            raise subprocess.CalledProcessError(1, cmd, stderr="encode failed")
+        Path(cmd[-1]).write_bytes(b"encoded")
+        return subprocess.CompletedProcess(cmd, 0, stdout="", stderr="")
+
+    monkeypatch.setattr(main.subprocess, "run", fake_run)
+
+    source = tmp_path / "video.webm"
+    source.write_bytes(b"source")
+    return calls, failing, source
+
+
+def _encoders(calls):
+    return [cmd[cmd.index("-c:v") + 1] for cmd in calls]
+
+
+def test_hardware_encoder_failure_retries_with_libx264(monkeypatch, ffmpeg_calls):
+    calls, failing, source = ffmpeg_calls
+    monkeypatch.setattr(main, "_H264_ENCODER", "h264_nvenc")
+    failing.add("h264_nvenc")
+
+    output = main.process_for_quicktime(source, source.parent)
+
+    assert _encoders(calls) == ["h264_nvenc", "libx264"]
+    assert output.read_bytes() == b"encoded"
+
+
+def test_libx264_failure_is_not_retried(monkeypatch, ffmpeg_calls):
+    calls, failing, source = ffmpeg_calls
+    monkeypatch.setattr(main, "_H264_ENCODER", "libx264")
+    failing.add("libx264")
+
+    with pytest.raises(RuntimeError, match="Video processing failed"):
+        main.process_for_quicktime(source, source.parent)
+
+    assert _encoders(calls) == ["libx264"]
+
+
+@pytest.mark.parametrize("encoder", sorted(set(main._H264_ENCODERS) - {"h264_vaapi"}))
+def test_reencode_pins_8bit_420(encoder):
+    cmd = main._reencode_cmd(encoder, Path("in.webm"), Path("out.mp4"))
+    assert cmd[cmd.index("-vf") + 1].endswith(",format=yuv420p")
@@ -0,0 +1,97 @@
+"""End-to-end tests for serving downloads through the full ASGI app."""
+
+import asyncio
+import json
+import os
+
+import pytest
+
+import main
+
+PAYLOAD = b"\x00\x00\x00\x18ftypmp42" + b"x" * 4096
+
+
+@pytest.fixture
+def run_download(monkeypatch, tmp_path):
+    """POST /download through main.app with download_video stubbed out."""
+    monkeypatch.setattr(main, "_AUTH_ENABLED", False)
+    monkeypatch.setattr(main, "_TEMP_ROOT", tmp_path / "root")
+    main.ensure_temp_root()
+
+    def fake_download_video(url, output_dir):
+        path = output_dir / "video.mp4"
+        path.write_bytes(PAYLOAD)
+        return path
+
+    monkeypatch.setattr(main, "download_video", fake_download_video)
+
+    def run(extensions: dict) -> list[dict]:
+        body = json.dumps({"url": "https://example.com/video"}).encode()
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": "/download",
+            "raw_path": b"/download",
+            "root_path": "",
+            "query_string": b"",
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+            "client": ("127.0.0.1", 50000),
+            "server": ("testserver", 80),
+            "extensions": extensions,
+        }
+        messages: list[dict] = []
+        request_sent = False
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # Client stays connected until the app is done with the response
+            await asyncio.Future()
+
+        async def send(message):
+            if message["type"] == "http.response.zerocopysend":
+                # Read while the server "owns" the fd: it must still be open
+                fd = message["file"]
+                os.lseek(fd, 0, os.SEEK_SET)
+                message = {**message, "content": os.read(fd, len(PAYLOAD) + 1)}
+            messages.append(message)
+
+        asyncio.run(main.app(scope, receive, send))
+        return messages
+
+    return run
+
+
+def test_zerocopysend_through_full_app(run_download):
+    messages = run_download({"http.response.zerocopysend": {}})
+
+    assert [m["type"] for m in messages] == [
+        "http.response.start",
+        "http.response.zerocopysend",
+    ]
+    start, body = messages
+    headers = dict(start["headers"])
+    assert start["status"] == 200
+    assert headers[b"content-length"] == str(len(PAYLOAD)).encode()
+    assert b"x-request-id" in headers
+    assert body["content"] == PAYLOAD
+    assert body["more_body"] is False
+
+
+def test_chunked_fallback_without_extension(run_download):
+    messages = run_download({})
+
+    start, *bodies = messages
+    assert start["type"] == "http.response.start"
+    assert start["status"] == 200
+    assert b"x-request-id" in dict(start["headers"])
+    assert all(m["type"] == "http.response.body" for m in bodies)
+    assert b"".join(m.get("body", b"") for m in bodies) == PAYLOAD